@@ -1,7 +1,12 @@
 """DNS Authenticator for Vimexx."""
 import logging
-from typing import Any, Optional, Protocol
+import pathlib
+import time
+from typing import Any, Dict, List, Optional, Protocol, Tuple
+from acme import challenges
 from certbot import errors
+from certbot.achallenges import AnnotatedChallenge
+from certbot.display import util as display_util
 from certbot.plugins import dns_common
 from .vimexx_client import VimexxClient
 from certbot import errors
@@ -10,6 +15,41 @@ logger = logging.getLogger(__name__)
 
 logger.debug("New certbot run started with Vimexx authenticator")
 
+def _parse_credentials(content: str) -> Dict[str, str]:
+    """Parse a 'key = value' credentials file.
+
+    Like ConfigParser, keys are case-insensitive and both '=' and ':' can be
+    used as delimiter (whichever comes first). Values are taken literally,
+    apart from surrounding whitespace and quotes. Comment lines and section
+    headers are skipped.
+    """
+    config: Dict[str, str] = {}
+    for line in content.splitlines():
+        line = line.strip()
+        if not line or line[0] in '#;' or line[0] == '[':
+            continue
+        delimiters = [i for i in (line.find('='), line.find(':')) if i != -1]
+        if not delimiters:
+            logger.debug("Ignoring credentials line without '=' or ':'")
+            continue
+        pos = min(delimiters)
+        key, value = line[:pos].strip().lower(), line[pos + 1:].strip()
+        if len(value) >= 2 and value[0] == value[-1] and value[0] in '"\'':
+            value = value[1:-1]
+        config[key] = value
+    return config
+
+def _achall_domain(achall: AnnotatedChallenge) -> str:
+    """Get the domain of a challenge the way the installed certbot version expects.
+
+    Newer certbot versions deprecate AnnotatedChallenge.domain in favour of
+    identifier.value; older versions only have domain.
+    """
+    identifier = getattr(achall, 'identifier', None)
+    if identifier is not None:
+        return identifier.value
+    return achall.domain
+
 # Define credential interface
 class CredentialProtocol(Protocol):
     def conf(self, name: str) -> str: ...
@@ -20,6 +60,7 @@ class DNSVimexxAuthenticator(dns_common.DNSAuthenticator):
     def __init__(self, *args: Any, **kwargs: Any) -> None:
         super().__init__(*args, **kwargs)
         self.credentials: Optional[CredentialProtocol] = None
+        self._client: Optional[VimexxClient] = None
 
     @classmethod
     def add_parser_arguments(cls, add):
@@ -36,41 +77,107 @@ class DNSVimexxAuthenticator(dns_common.DNSAuthenticator):
         credentials_path = self.conf('credentials')
         logger.debug("Starting credentials setup")
         
-        # Read raw file with interpolation disabled
-        import configparser
-        config = configparser.ConfigParser(interpolation=None)
-        
+        # Read raw file; values are taken literally, so passwords with special characters just work
         try:
-            config.read(credentials_path)
-        except configparser.MissingSectionHeaderError:
-            logger.debug(f"No section header found in {credentials_path}, adding [default] section")
-            with open(credentials_path, 'r') as f:
-                config_string = '[default]\n' + f.read()
-            config.read_string(config_string)
+            content = pathlib.Path(credentials_path).read_text()
+        except OSError as e:
+            raise errors.PluginError(f"Cannot read credentials file {credentials_path}: {e}")
+
+        config = _parse_credentials(content)
         
         # Create our own credentials object as certbot's credential interface doesn't handle passwords with special characters well
         class VimexxCredentials:
             def __init__(self, config):
-                self.client_id = config['default']['client_id']
-                self.client_secret = config['default']['client_secret']
-                self.username = config['default']['username']
-                self.password = config['default']['password']
+                self.client_id = config.get('client_id')
+                self.client_secret = config.get('client_secret')
+                self.username = config.get('username')
+                self.password = config.get('password')
             
             def conf(self, name):
                 """Maintain compatibility with Certbot's credential interface"""
                 return getattr(self, name.replace('-', '_'))
         
-        self.credentials = VimexxCredentials(config)
+        credentials = VimexxCredentials(config)
+
+        # Validate credentials are present
+        missing = []
+        if not credentials.client_id: missing.append('client-id')
+        if not credentials.client_secret: missing.append('client-secret')
+        if not credentials.username: missing.append('username')
+        if not credentials.password: missing.append('password')
+
+        if missing:
+            raise errors.PluginError(f"Missing required credentials: {', '.join(missing)}")
+
+        self.credentials = credentials
+
+    def perform(self, achalls: List[AnnotatedChallenge]) -> List[challenges.ChallengeResponse]:
+        """Perform all DNS-01 challenges, with one DNS update per domain.
+
+        Certbot's default implementation calls _perform for every challenge,
+        which pushes the complete record set of the domain each time.
+        """
+        self._setup_credentials()
+
+        self._attempt_cleanup = True
+
+        client = self._get_vimexx_client()
+        for (sld, tld), records in self._group_by_zone(client, achalls).items():
+            logger.debug("Adding %d TXT record(s) to %s.%s", len(records), sld, tld)
+            client.add_txt_records(sld, tld, records)
+
+        responses = [achall.response(achall.account_key) for achall in achalls]
+
+        # DNS updates take time to propagate, so wait a fixed amount of time
+        # just like dns_common.DNSAuthenticator does.
+        propagation_seconds = self.conf('propagation-seconds')
+        display_util.notify(
+            f"Waiting {propagation_seconds} seconds for DNS changes to propagate")
+        time.sleep(propagation_seconds)
+
+        return responses
+
+    def cleanup(self, achalls: List[AnnotatedChallenge]) -> None:
+        """Clean up all DNS-01 challenges, with one DNS update per domain."""
+        if not self._attempt_cleanup:
+            return
+
+        logger.info("Starting DNS challenge cleanup")
+        client = self._get_vimexx_client()
+        for (sld, tld), records in self._group_by_zone(client, achalls).items():
+            logger.debug("Removing %d TXT record(s) from %s.%s", len(records), sld, tld)
+            client.delete_txt_records(sld, tld, records)
+
+    @staticmethod
+    def _group_by_zone(client: VimexxClient, achalls: List[AnnotatedChallenge]
+                       ) -> Dict[Tuple[str, str], List[Tuple[str, str]]]:
+        """Group challenges as (validation name, validation) pairs per (sld, tld)."""
+        zones: Dict[Tuple[str, str], List[Tuple[str, str]]] = {}
+        for achall in achalls:
+            domain = _achall_domain(achall)
+            validation_name = achall.validation_domain_name(domain)
+            validation = achall.validation(achall.account_key)
+            logger.debug(
+                "Queueing DNS challenge\n"
+                "Domain: %s\n"
+                "Validation name: %s\n"
+                "Validation value: %s",
+                domain, validation_name, validation
+            )
+            zone = client.extract_domain_parts(domain)
+            zones.setdefault(zone, []).append((validation_name, validation))
+        return zones
 
     def _perform(self, domain: str, validation_name: str, validation: str) -> None:
         """
         Perform a DNS-01 challenge by creating a TXT record.
         """
         logger.debug(
-            f"Starting new DNS challenge\n"
-            f"Domain: {domain}\n"
-            f"Validation name: {validation_name}\n"
-            f"Validation value: {validation}"
+            "Starting new DNS challenge\n"
+            "Domain: %s\n"
+            "Validation name: %s\n"
+            "Validation value: %s",
+            domain, validation_name, validation
         )
         
         self._get_vimexx_client().add_txt_record(
@@ -86,37 +193,31 @@ class DNSVimexxAuthenticator(dns_common.DNSAuthenticator):
             domain, validation_name, validation)
 
     def _get_vimexx_client(self) -> VimexxClient:
-        """Get a new Vimexx client."""
+        """Get the Vimexx client, creating it on first use.
+
+        The client is kept for the rest of the certbot run, so its access
+        token is reused across all challenges instead of re-authenticating
+        for every _perform and _cleanup call.
+        """
+        if self._client is not None:
+            return self._client
+
         logger.debug("Creating Vimexx client")
         
         if self.credentials is None:
             raise errors.PluginError("Credentials not configured")
         
-        # Get credentials
-        client_id = self.credentials.conf('client-id')
-        client_secret = self.credentials.conf('client-secret')
-        username = self.credentials.conf('username')
-        password = self.credentials.conf('password')
+        # Get credentials (validated in _setup_credentials)
+        client_id: str = self.credentials.conf('client-id') or ''
+        client_secret: str = self.credentials.conf('client-secret') or ''
+        username: str = self.credentials.conf('username') or ''
+        password: str = self.credentials.conf('password') or ''
         
-        # Validate credentials are present
-        missing = []
-        if not client_id: missing.append('client-id')
-        if not client_secret: missing.append('client-secret')
-        if not username: missing.append('username')
-        if not password: missing.append('password')
-        
-        if missing:
-            raise errors.PluginError(f"Missing required credentials: {', '.join(missing)}")
-            
-        # After validation, we can safely assert these are strings
-        assert isinstance(client_id, str)
-        assert isinstance(client_secret, str)
-        assert isinstance(username, str)
-        assert isinstance(password, str)
-        
-        return VimexxClient(
+        self._client = VimexxClient(
             client_id=client_id,
             client_secret=client_secret,
             username=username,
-            password=password
-        )
\ No newline at end of file
+            password=password,
+            token_path=f"{self.conf('credentials')}.token"
+        )
+        return self._client
\ No newline at end of file
@@ -1,12 +1,47 @@
 import requests
+import functools
+import json
 import logging
-from typing import Dict, Optional, Any
-from urllib.parse import quote, quote_plus
-import tldextract
+import os
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import quote_plus, urlencode
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from certbot import errors
 
+try:
+    import orjson
+except ImportError:  # orjson is optional, install with the "fast" extra
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
+
+@functools.lru_cache(maxsize=256)
+def _extract(name: str) -> tuple[str, str]:
+    """Split a domain name (without wildcard or trailing dot) into SLD and TLD.
+
+    Domains with only two labels are split directly; tldextract (which
+    loads the Public Suffix List) is only imported for longer names. This
+    means a bare multi-label public suffix such as 'co.uk' is accepted as
+    ('co', 'uk') rather than rejected; no certificate can be issued for
+    such a name anyway, so the Vimexx API is left to refuse it.
+    """
+    rest, _, tld = name.rpartition('.')
+    if rest and tld and '.' not in rest:
+        return rest, tld
+
+    import tldextract
+    extracted = tldextract.extract(name)
+
+    if not extracted.domain or not extracted.suffix:
+        raise errors.PluginError(f"Cannot parse domain: {name}")
+
+    return extracted.domain, extracted.suffix
+
+
 class VimexxClient:
     """Client for the Vimexx API."""
 
@@ -16,8 +51,11 @@ class VimexxClient:
     WHMCS_VERSION = "8.6.1-release.1" # Valid WHMCS version number required for Vimexx API calls
     BASE_URL = "https://api.vimexx.nl"
     API_PATH = "/api/v1"
+    TOKEN_EXPIRY_MARGIN = 30  # Seconds before actual expiry at which a token is considered stale
+    MAX_CONFLICT_RETRIES = 3  # Times to re-fetch and retry an update refused because of a concurrent change
 
-    def __init__(self, client_id: str, client_secret: str, username: str, password: str):
+    def __init__(self, client_id: str, client_secret: str, username: str, password: str,
+                 token_path: Optional[str] = None):
         """Initialize the Vimexx API client.
         
         Args:
@@ -25,44 +63,76 @@ class VimexxClient:
             client_secret: The OAuth2 client secret from Vimexx
             username: Your Vimexx account username
             password: Your Vimexx account password
+            token_path: Optional file to persist the refresh token between runs
         """
-        logger.debug(f"Initializing VimexxClient with username {username}")
+        logger.debug("Initializing VimexxClient with username %s", username)
         
         self.client_id = client_id
         self.client_secret = client_secret
         self.username = username
         self.password = password
+        self.token_path = token_path
         self.access_token = None
+        self._token_expiry: Optional[float] = None
+        self._api_headers: Dict[str, str] = {}
+        self._records_cache: Dict[tuple[str, str], List[Dict[str, Any]]] = {}
+        self._etags: Dict[tuple[str, str], Optional[str]] = {}
 
-    def _extract_domain_parts(self, domain: str) -> tuple[str, str]:
-        """Extract SLD and TLD using Public Suffix List.
-        """
-        extracted = tldextract.extract(domain.lstrip('*.'))
-        
-        if not extracted.domain or not extracted.suffix:
-            raise errors.PluginError(f"Cannot parse domain: {domain}")
-        
-        return extracted.domain, extracted.suffix
+        self._dns_url = f"{self.BASE_URL}{self.API_PATH}/whmcs/domain/dns"
+
+        # Credentials don't change during a run, so the token request is built once
+        self._auth_url = f"{self.BASE_URL}/auth/token"
+        self._auth_headers = {
+            'Content-Type': 'application/x-www-form-urlencoded'
+        }
+        self._auth_payload = urlencode({
+            'grant_type': 'password',
+            'client_id': client_id,
+            'client_secret': client_secret,
+            'username': username,
+            'password': password,
+            'scope': 'whmcs-access'
+        }, quote_via=quote_plus)
+
+        # Reuse connections to the API for all requests in this run
+        self._session = requests.Session()
+        self._session.mount("https://", HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=4,
+            max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=[502, 503, 504])
+        ))
+        self._method_map = {
+            'GET': self._session.get,
+            'POST': self._session.post,
+            'PUT': self._session.put,
+            'PATCH': self._session.patch
+        }
+
+    def extract_domain_parts(self, domain: str) -> tuple[str, str]:
+        """Extract SLD and TLD, using the Public Suffix List for names with more than two labels."""
+        return _extract(domain.lstrip('*.').rstrip('.'))
 
     def authenticate(self) -> Dict[str, str]:
         """Authenticate with the Vimexx API and get an access token."""
+        logger.debug("Initiating authentication process")
+        return self._request_token(self._auth_payload)
+
+    def _refresh(self, refresh_token: str) -> Dict[str, str]:
+        """Get a new access token using a refresh token saved by a previous run."""
+        logger.debug("Initiating token refresh")
+        payload_script = urlencode({
+            'grant_type': 'refresh_token',
+            'refresh_token': refresh_token,
+            'client_id': self.client_id,
+            'client_secret': self.client_secret,
+            'scope': 'whmcs-access'
+        }, quote_via=quote_plus)
+        return self._request_token(payload_script)
+
+    def _request_token(self, payload_script: str) -> Dict[str, str]:
+        """Request a token from the OAuth2 token endpoint and store it."""
         try:
-            logger.debug("Initiating authentication process")
-            auth_url = f"{self.BASE_URL}/auth/token"
-            headers_script = {
-                'Content-Type': 'application/x-www-form-urlencoded'
-            }
-
-            payload_script = '&'.join([
-                'grant_type=password',
-                f'client_id={quote(self.client_id)}',
-                f'client_secret={quote(self.client_secret)}',
-                f'username={quote(self.username)}',
-                f'password={quote_plus(self.password)}',
-                'scope=whmcs-access'
-            ])
-
-            response = requests.post(auth_url, headers=headers_script, data=payload_script)
+            response = self._session.post(self._auth_url, headers=self._auth_headers, data=payload_script)
 
             if response.status_code == 401:
                 logger.debug("Authentication failed: invalid credentials")
@@ -77,63 +147,318 @@ class VimexxClient:
                 if "access_token" not in token_data:
                     raise errors.PluginError("Invalid response: no access token received")
                 
+                # Without a usable lifetime the token is kept until the API rejects it
+                token_expiry = None
+                expires_in = token_data.get("expires_in")
+                if expires_in is not None:
+                    try:
+                        token_expiry = time.monotonic() + float(expires_in) - self.TOKEN_EXPIRY_MARGIN
+                    except (TypeError, ValueError):
+                        logger.debug("Ignoring invalid access token lifetime: %r", expires_in)
+
                 self.access_token = token_data["access_token"]
+                self._api_headers = {
+                    "Authorization": f"Bearer {self.access_token}",
+                    "Content-Type": "application/json"
+                }
+                self._token_expiry = token_expiry
                 logger.debug("Successfully authenticated with Vimexx API and obtained access token")
+                self._save_refresh_token(token_data)
                 return token_data
                 
             except ValueError as e:
-                logger.debug(f"Failed to parse response: {response.text}")
+                logger.debug("Failed to parse response: %s", response.text)
                 raise errors.PluginError(f"Invalid response from Vimexx API: {str(e)}")
                 
         except requests.exceptions.RequestException as e:
-            logger.debug(f"Request failed: {str(e)}")
+            logger.debug("Request failed: %s", e)
             raise errors.PluginError(
                 f"Failed to connect to Vimexx API: {str(e)}"
             )
 
-    def api_request(self, endpoint: str, method: str = 'GET', body: Optional[Dict] = None) -> Dict[str, Any]:
-        """Make an authenticated API request."""
-        logger.debug("Check if access token is set")
+    def _save_refresh_token(self, token_data: Dict[str, Any]) -> None:
+        """Persist the refresh token (if any) so the next certbot run can use it."""
+        if not self.token_path or "refresh_token" not in token_data:
+            return
+
+        # The token endpoint doesn't always say how long the refresh token lives;
+        # without an expiry we just try it and fall back to the password grant.
+        expires_at = None
+        expires_in = token_data.get("refresh_token_expires_in")
+        if expires_in is not None:
+            try:
+                expires_at = time.time() + float(expires_in)
+            except (TypeError, ValueError):
+                logger.debug("Ignoring invalid refresh token lifetime: %r", expires_in)
+        saved = {
+            "refresh_token": token_data["refresh_token"],
+            "expires_at": expires_at
+        }
+
+        # Write to a new, uniquely named temporary file that only the owner can
+        # read (mkstemp uses O_EXCL and mode 0600) and move it into place, so an
+        # existing token file never keeps looser permissions, an interrupted write
+        # never leaves a truncated token file behind, and a planted file or
+        # symlink can't redirect the write.
+        tmp_path = None
+        try:
+            fd, tmp_path = tempfile.mkstemp(
+                dir=os.path.dirname(os.path.abspath(self.token_path)),
+                prefix=f".{os.path.basename(self.token_path)}.")
+            with os.fdopen(fd, 'w') as f:
+                json.dump(saved, f)
+            os.replace(tmp_path, self.token_path)
+            logger.debug("Saved refresh token to %s", self.token_path)
+        except OSError as e:
+            logger.warning("Could not save refresh token to %s: %s", self.token_path, e)
+            if tmp_path is not None:
+                self._remove_file(tmp_path)
+
+    @staticmethod
+    def _remove_file(path: str) -> None:
+        """Remove a file, ignoring it if it's already gone or can't be removed."""
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning("Could not remove %s: %s", path, e)
+
+    def _load_refresh_token(self) -> Optional[str]:
+        """Load a saved, non-expired refresh token from a previous certbot run."""
+        if not self.token_path:
+            return None
+        try:
+            with open(self.token_path, 'r') as f:
+                saved = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.debug("Could not read saved refresh token from %s: %s", self.token_path, e)
+            return None
+
+        if not isinstance(saved, dict) or not saved.get("refresh_token"):
+            return None
+        expires_at = saved.get("expires_at")
+        if expires_at is not None:
+            if not isinstance(expires_at, (int, float)):
+                logger.debug("Ignoring saved refresh token with invalid expiry: %r", expires_at)
+                return None
+            if time.time() >= expires_at:
+                logger.debug("Saved refresh token has expired")
+                return None
+        return saved["refresh_token"]
+
+    def _token_expired(self) -> bool:
+        """Check whether the current access token is missing or expired."""
         if not self.access_token:
-            logger.info("No access token present, attempting authentication")
-            self.authenticate()
+            return True
+        return self._token_expiry is not None and time.monotonic() >= self._token_expiry
+
+    def _ensure_token(self) -> None:
+        """Make sure we have a valid access token, refreshing or authenticating if needed."""
+        logger.debug("Check if access token is set and valid")
+        if self._token_expired():
+            refresh_token = self._load_refresh_token()
+            if refresh_token:
+                logger.info("No valid access token present, refreshing with saved refresh token")
+                try:
+                    self._refresh(refresh_token)
+                except errors.PluginError as e:
+                    logger.debug("Token refresh failed, falling back to password grant: %s", e)
+                    # Don't try the dead refresh token again on the next run; the
+                    # password grant below saves a new one if the API hands one out
+                    self._remove_file(self.token_path)
+                    self.authenticate()
+            else:
+                logger.info("No valid access token present, attempting authentication")
+                self.authenticate()
             logger.debug("Access token set successfully")
 
+    def _parse_response(self, response: requests.Response) -> Dict[str, Any]:
+        """Check an API response for errors and decode its JSON body."""
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "Response Status: %s\n"
+                "Response Headers: %s\n"
+                "Response Body: %s",
+                response.status_code, dict(response.headers), response.text)
+
+        response.raise_for_status()
+        if orjson is not None:
+            return orjson.loads(response.content)
+        return response.json()
+
+    def api_request(self, endpoint: str, method: str = 'GET', body: Optional[Dict] = None) -> Dict[str, Any]:
+        """Make an authenticated API request."""
+        self._ensure_token()
+
         logger.debug("=== Making API Request ===")
-        headers = {
-            "Authorization": f"Bearer {self.access_token}",
-            "Content-Type": "application/json"
-        }
-        logger.debug(f"Headers: {headers}")
+        headers = self._api_headers
+        if logger.isEnabledFor(logging.DEBUG):
+            # Never log the bearer token itself
+            logger.debug("Headers: %s", {**headers, "Authorization": "Bearer ***"})
 
         url = f"{self.BASE_URL}{self.API_PATH}{endpoint}"
-        logger.debug(f"URL: {url}")
+        logger.debug("URL: %s", url)
 
         data = {
             "body": body,
             "version": self.WHMCS_VERSION
         }
-        logger.debug(f"Data: {data}")
-        
-        logger.debug(f"Method: {method}")
-
-        response = requests.request(
-            method=method.upper(),
-            url=url,
-            headers=headers,
-            json=data if method.upper() in ["POST", "PUT", "PATCH"] else None,
-            params=data if method.upper() == "GET" else None
-        )
+        logger.debug("Data: %s", data)
         
-        logger.debug(
-            f"Response Status: {response.status_code}"
-            f"Response Headers: {dict(response.headers)}"
-            f"Response Body: {response.text}")
+        method = method.upper()
+        logger.debug("Method: %s", method)
 
-        response.raise_for_status()
-        return response.json()
+        send = self._method_map.get(method)
+        if method == "GET":
+            response = send(url, headers=headers, params=data)
+        elif send is not None and orjson is not None:
+            response = send(url, headers=headers, data=orjson.dumps(data))
+        elif send is not None:
+            response = send(url, headers=headers, json=data)
+        else:
+            response = self._session.request(method, url, headers=headers)
+
+        return self._parse_response(response)
+
+    def _dns_request(self, method: str, body: Dict[str, Any],
+                     etag: Optional[str] = None) -> tuple[Dict[str, Any], Optional[str]]:
+        """Send a request to the DNS endpoint, the only endpoint this plugin needs.
+
+        Same as api_request, but without working out URL, headers and body
+        encoding for every call. Returns the decoded response and its ETag
+        header, if the API sent one.
+        """
+        self._ensure_token()
+        headers = self._api_headers
+        if etag is not None:
+            headers = {**headers, "If-Match": etag}
+        data = {"body": body, "version": self.WHMCS_VERSION}
+        send = self._method_map[method]
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "=== Making API Request ===\n"
+                "URL: %s\n"
+                "Method: %s\n"
+                "If-Match: %s\n"
+                "Data: %s",
+                self._dns_url, method, etag, data)
+        if orjson is not None:
+            response = send(self._dns_url, headers=headers, data=orjson.dumps(data))
+        else:
+            response = send(self._dns_url, headers=headers, json=data)
+        return self._parse_response(response), response.headers.get('ETag')
+
+    def _get_dns(self, sld: str, tld: str) -> tuple[Dict[str, Any], Optional[str]]:
+        """Fetch the DNS records of a domain (the API uses POST for this)."""
+        return self._dns_request('POST', {"sld": sld, "tld": tld})
 
-    def add_txt_record(self, domain: str, record_name: str, record_content: str) -> None:
+    def _put_dns(self, sld: str, tld: str, records: List[Dict[str, Any]],
+                 etag: Optional[str] = None) -> tuple[Dict[str, Any], Optional[str]]:
+        """Replace the complete set of DNS records of a domain.
+
+        With an ETag from a previous fetch, the API can refuse the update
+        (412 Precondition Failed) if the records were changed in the meantime.
+        """
+        return self._dns_request('PUT', {
+            "sld": sld,
+            "tld": tld,
+            "dns_records": records
+        }, etag)
+
+    def _get_dns_records(self, sld: str, tld: str, force_refresh: bool = False) -> List[Dict[str, Any]]:
+        """Get the DNS records of a domain, reusing the last known record set if it is safe.
+
+        The cached record set is the one we last fetched or pushed ourselves. It
+        is only reused when the API gave us an ETag for it, because then an
+        update based on outdated records is refused (see _put_dns). Without an
+        ETag the records are fetched again, so changes made in the meantime
+        (e.g. during the propagation wait) are not reverted.
+        """
+        key = (sld, tld)
+        if not force_refresh and key in self._records_cache and self._etags.get(key) is not None:
+            logger.debug("Using cached DNS records for %s.%s", sld, tld)
+            return self._records_cache[key]
+
+        logger.debug("Fetching current DNS records...")
+        response, etag = self._get_dns(sld, tld)
+        records = response.get('data', {}).get('dns_records', [])
+        self._records_cache[key] = records
+        self._etags[key] = etag
+        return records
+
+    def _put_dns_records(self, sld: str, tld: str, records: List[Dict[str, Any]]) -> bool:
+        """Push the complete set of DNS records of a domain and remember it.
+
+        Returns False if the records were changed by someone else since we
+        fetched them, in which case the caller should fetch and try again.
+        """
+        key = (sld, tld)
+        try:
+            _, etag = self._put_dns(sld, tld, records, self._etags.get(key))
+        except requests.exceptions.HTTPError as e:
+            self._forget_dns_records(key)
+            if e.response is not None and e.response.status_code == 412:
+                logger.info("DNS records of %s.%s were changed in the meantime", sld, tld)
+                return False
+            raise
+        except Exception:
+            self._forget_dns_records(key)
+            raise
+        self._records_cache[key] = records
+        self._etags[key] = etag
+        return True
+
+    def _forget_dns_records(self, key: tuple[str, str]) -> None:
+        """Drop the cached records of a domain, e.g. because we no longer know what the zone looks like."""
+        self._records_cache.pop(key, None)
+        self._etags.pop(key, None)
+
+    def _update_dns_records(self, sld: str, tld: str,
+                            build: Callable[[List[Dict[str, Any]]], Optional[List[Dict[str, Any]]]],
+                            force_refresh: bool = False) -> bool:
+        """Read-modify-write the DNS records of a domain, retrying on concurrent changes.
+
+        Args:
+            sld: The second-level domain (e.g., 'example')
+            tld: The top-level domain (e.g., 'com')
+            build: Gets the current records and returns the complete set of
+                records to push, or None if nothing needs to change
+            force_refresh: Fetch the records from Vimexx even if we have them cached
+
+        Returns:
+            True if the records were updated, False if nothing needed to change
+
+        Raises:
+            PluginError: If the records kept changing while we tried to update them
+        """
+        for attempt in range(self.MAX_CONFLICT_RETRIES + 1):
+            # Get current records
+            current_records = self._get_dns_records(sld, tld, force_refresh or attempt > 0)
+            logger.debug("Found %d existing records", len(current_records))
+
+            updated_records = build(current_records)
+            if updated_records is None:
+                return False
+
+            # Update records
+            logger.debug("Updating DNS records (total: %d)...", len(updated_records))
+            if self._put_dns_records(sld, tld, updated_records):
+                return True
+
+        raise errors.PluginError(f"DNS records of {sld}.{tld} kept changing while updating them")
+
+    @staticmethod
+    def _txt_key(record: Dict[str, Any]) -> Optional[tuple[str, str]]:
+        """Get the (name, content) of a TXT record as returned by the API, or None for other types."""
+        if record.get('type') != 'TXT':
+            return None
+        return record.get('name', '').rstrip('.'), record.get('content', '').strip('"')
+
+    def add_txt_record(self, domain: str, record_name: str, record_content: str,
+                       force_refresh: bool = False) -> None:
         """Add a TXT record for DNS-01 challenge.
         
         Due to Vimexx API limitations, this retrieves all existing records,
@@ -143,95 +468,105 @@ class VimexxClient:
             domain: The domain name (e.g., 'example.com')
             record_name: Full record name (e.g., '_acme-challenge.example.com')
             record_content: The challenge token value
+            force_refresh: Fetch the records from Vimexx even if we have them cached
             
         Raises:
             PluginError: If DNS operation fails
         """
         
         logger.info(
-            f"Adding TXT record for domain {domain}\n"
-            f"- Name: {record_name}\n"
-            f"- Content: {record_content}")
-        
-        sld, tld = self._extract_domain_parts(domain)
-        
-        # Get current records
-        logger.debug("Fetching current DNS records...")
-        response = self.api_request('/whmcs/domain/dns', 'POST', {"sld": sld, "tld": tld})
-        current_records = response.get('data', {}).get('dns_records', [])
-        logger.debug(f"Found {len(current_records)} existing records")
-        
-        # Ensure all existing records have TTL
-        updated_records = []
-        for record in current_records:
-            record_copy = record.copy()
-            if 'ttl' not in record_copy:
-                record_copy['ttl'] = self.DEFAULT_TTL
-            updated_records.append(record_copy)
+            "Adding TXT record for domain %s\n"
+            "- Name: %s\n"
+            "- Content: %s",
+            domain, record_name, record_content)
         
-        # Add new TXT record
-        new_record = {
-            "name": record_name,
-            "type": "TXT",
-            "content": record_content,
-            "ttl": self.CHALLENGE_TTL
-        }
-        updated_records.append(new_record)
-        logger.debug("New TXT record added")
+        sld, tld = self.extract_domain_parts(domain)
+        self.add_txt_records(sld, tld, [(record_name, record_content)], force_refresh)
+
+    def add_txt_records(self, sld: str, tld: str, records: List[tuple[str, str]],
+                        force_refresh: bool = False) -> None:
+        """Add several TXT records to one domain with a single update.
         
-        # Update records
-        logging.debug(f"Updating DNS records (total: {len(updated_records)})...")
+        Args:
+            sld: The second-level domain (e.g., 'example')
+            tld: The top-level domain (e.g., 'com')
+            records: (record name, challenge token value) pairs to add
+            force_refresh: Fetch the records from Vimexx even if we have them cached
+            
+        Raises:
+            PluginError: If DNS operation fails
+        """
+
+        def build(current_records: List[Dict[str, Any]]) -> Optional[List[Dict[str, Any]]]:
+            # Skip records that are already present, e.g. when retrying after a network error
+            existing = {self._txt_key(record) for record in current_records}
+            missing = [record for record in records if record not in existing]
+            if not missing:
+                logger.debug("All TXT records already present, nothing to update")
+                return None
+
+            # Ensure all existing records have TTL. This changes the cached record
+            # list in place (and the new records are appended to it below); that is
+            # fine because it is exactly what we push, and _put_dns_records drops
+            # the cache if the push fails.
+            updated_records = current_records
+            for record in updated_records:
+                record.setdefault('ttl', self.DEFAULT_TTL)
+
+            # Add new TXT records
+            for record_name, record_content in missing:
+                new_record = {
+                    "name": record_name,
+                    "type": "TXT",
+                    "content": record_content,
+                    "ttl": self.CHALLENGE_TTL
+                }
+                updated_records.append(new_record)
+            logger.debug("%d new TXT record(s) added", len(missing))
+            return updated_records
+
         try:
-            self.api_request('/whmcs/domain/dns', 'PUT', {
-                "sld": sld,
-                "tld": tld,
-                "dns_records": updated_records
-            })
+            updated = self._update_dns_records(sld, tld, build, force_refresh)
+        except errors.PluginError:
+            raise
         except requests.exceptions.RequestException as e:
-            logger.error(f"Failed to add DNS record: {e}")
+            logger.error("Failed to add DNS record: %s", e)
             raise errors.PluginError(f"DNS record creation failed: {e}")
         except Exception as e:
-            logger.error(f"Unexpected error adding DNS record: {e}")
+            logger.error("Unexpected error adding DNS record: %s", e)
             raise errors.PluginError(f"DNS operation failed: {e}")
-        logging.info("TXT record added successfully")
+        if updated:
+            logger.info("TXT record added successfully")
         
-    def delete_txt_record(self, domain: str, record_name: str, record_content: str) -> None:
+    def delete_txt_record(self, domain: str, record_name: str, record_content: str,
+                          force_refresh: bool = False) -> None:
         """Delete a TXT record from domain."""
         
-        sld, tld = self._extract_domain_parts(domain)
-        
-        # Get current records
-        logging.debug("Fetching current DNS records...")
-        response = self.api_request('/whmcs/domain/dns', 'POST', {"sld": sld, "tld": tld})
-        current_records = response.get('data', {}).get('dns_records', [])
-        logging.debug(f"Found {len(current_records)} existing records")
-
-        # Filter out the ACME challenge record
-        logging.debug(f"Filtering for TXT records with name '{record_name}' and content '{record_content}'")
-        updated_records = []
-        for record in current_records:
-            record_type = record.get('type')
-            record_name_api = record.get('name', '').rstrip('.')
-            record_content_api = record.get('content', '').strip('"')
-
-            if (record_name_api == record_name and 
-                record_type == 'TXT' and 
-                record_content_api == record_content):
-                logging.debug(f"Found matching record to remove")
-                continue
-                
-            updated_records.append(record)
-        logging.debug(f"Updated records count after filtering: {len(updated_records)}")
-        
-        # Update records with TTL
-        for record in updated_records:
-            record['ttl'] = '86400'
+        sld, tld = self.extract_domain_parts(domain)
+        self.delete_txt_records(sld, tld, [(record_name, record_content)], force_refresh)
 
-        # Update records
-        self.api_request('/whmcs/domain/dns', 'PUT', {
-            "sld": sld,
-            "tld": tld,
-            "dns_records": updated_records
-        })
+    def delete_txt_records(self, sld: str, tld: str, records: List[tuple[str, str]],
+                           force_refresh: bool = False) -> None:
+        """Delete several TXT records from one domain with a single update."""
         
-        logger.info("TXT record deleted successfully")
\ No newline at end of file
+        to_remove = set(records)
+
+        def build(current_records: List[Dict[str, Any]]) -> Optional[List[Dict[str, Any]]]:
+            # Filter out the ACME challenge records
+            logger.debug("Filtering for TXT records matching %s", records)
+            # Keep everything except the challenge records, applying the TTL in the same pass
+            updated_records = [
+                {**record, 'ttl': self.DEFAULT_TTL}
+                for record in current_records
+                if self._txt_key(record) not in to_remove
+            ]
+            removed = len(current_records) - len(updated_records)
+            if not removed:
+                logger.debug("No matching TXT records found, nothing to update")
+                return None
+            logger.debug("Removed %d matching record(s), "
+                         "updated records count after filtering: %d", removed, len(updated_records))
+            return updated_records
+
+        if self._update_dns_records(sld, tld, build, force_refresh):
+            logger.info("TXT record deleted successfully")
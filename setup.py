@@ -8,11 +8,14 @@ setup(
     long_description_content_type='text/markdown',
     packages=find_packages(),
     install_requires=[
+        'acme',
         'certbot',
         'requests',
-        'zope.interface',
         'tldextract'
     ],
+    extras_require={
+        'fast': ['orjson']
+    },
     entry_points={
         'certbot.plugins': [
             'dns-vimexx = certbot_dns_vimexx.dns_vimexx:DNSVimexxAuthenticator'
@@ -30,5 +33,5 @@ setup(
         'Topic :: Security :: Cryptography',
         'Topic :: System :: Systems Administration'
     ],
-    python_requires='>=3.6',
+    python_requires='>=3.9',
 )
\ No newline at end of file
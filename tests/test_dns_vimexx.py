@@ -0,0 +1,124 @@
+"""Tests for certbot_dns_vimexx.dns_vimexx."""
+import json
+import warnings
+from unittest import mock
+
+import josepy as jose
+import pytest
+from acme import challenges, messages
+from certbot import achallenges
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+from certbot_dns_vimexx import dns_vimexx, vimexx_client
+from certbot_dns_vimexx.dns_vimexx import DNSVimexxAuthenticator, _parse_credentials
+
+ACCOUNT_KEY = jose.JWKRSA(key=rsa.generate_private_key(public_exponent=65537, key_size=2048))
+
+
+def test_parse_credentials():
+    content = """
+# Vimexx credentials
+[default]
+client_id = 123
+Client_Secret: abc=def
+username = "user@example.com"
+; password below contains special characters
+password = p%a:s=s'
+"""
+
+    assert _parse_credentials(content) == {
+        'client_id': '123',
+        'client_secret': 'abc=def',
+        'username': 'user@example.com',
+        'password': "p%a:s=s'",
+    }
+
+
+def test_parse_credentials_ignores_lines_without_delimiter():
+    assert _parse_credentials("client_id 123\nusername=user") == {'username': 'user'}
+
+
+def _achall(domain, token):
+    return achallenges.KeyAuthorizationAnnotatedChallenge(
+        challb=messages.ChallengeBody(
+            chall=challenges.DNS01(token=token), uri='https://ca.example/chall', status=messages.STATUS_PENDING),
+        identifier=messages.Identifier(typ=messages.IDENTIFIER_FQDN, value=domain),
+        account_key=ACCOUNT_KEY)
+
+
+def _dns_response(records):
+    response = mock.Mock(status_code=200, headers={})
+    data = {'data': {'dns_records': records}}
+    response.json.return_value = data
+    response.content = json.dumps(data).encode()
+    response.text = response.content.decode()
+    return response
+
+
+@pytest.fixture
+def authenticator(tmp_path):
+    credentials = tmp_path / 'vimexx.ini'
+    credentials.write_text("client_id = 123\nclient_secret = abc\nusername = user\npassword = pass\n")
+    config = mock.MagicMock(dns_vimexx_credentials=str(credentials),
+                            dns_vimexx_propagation_seconds=30)
+    authenticator = DNSVimexxAuthenticator(config, 'dns-vimexx')
+    authenticator._setup_credentials()
+    with mock.patch.object(vimexx_client.requests, 'Session'):
+        client = authenticator._get_vimexx_client()
+    client.access_token = 'access'
+    client._api_headers = {'Authorization': 'Bearer access'}
+    client._session.post.side_effect = lambda *a, **kw: _dns_response([])
+    client._session.put.side_effect = lambda *a, **kw: _dns_response([])
+    return authenticator
+
+
+def _pushed_record_names(put_call):
+    body = put_call.kwargs['json'] if 'json' in put_call.kwargs else json.loads(put_call.kwargs['data'])
+    return sorted(record['name'] for record in body['body']['dns_records'])
+
+
+def test_perform_and_cleanup_update_each_zone_once(authenticator):
+    achalls = [
+        _achall('example.com', b'a' * 16),
+        _achall('other.nl', b'b' * 16),
+        _achall('www.example.com', b'c' * 16),
+    ]
+    session = authenticator._client._session
+
+    with mock.patch.object(dns_vimexx.time, 'sleep') as sleep, \
+            mock.patch.object(dns_vimexx.display_util, 'notify'), \
+            warnings.catch_warnings():
+        warnings.simplefilter('error', DeprecationWarning)
+        responses = authenticator.perform(achalls)
+
+    assert responses == [achall.response(ACCOUNT_KEY) for achall in achalls]
+    sleep.assert_called_once_with(30)
+    assert session.post.call_count == 2
+    assert session.put.call_count == 2
+    assert [_pushed_record_names(call) for call in session.put.call_args_list] == [
+        ['_acme-challenge.example.com', '_acme-challenge.www.example.com'],
+        ['_acme-challenge.other.nl'],
+    ]
+
+    # Every zone now holds its challenge records, so cleanup removes them again
+    session.post.side_effect = [
+        _dns_response([{'name': name, 'type': 'TXT', 'content': validation}
+                       for name, validation in records])
+        for records in authenticator._group_by_zone(authenticator._client, achalls).values()
+    ]
+    session.put.reset_mock()
+    with warnings.catch_warnings():
+        warnings.simplefilter('error', DeprecationWarning)
+        authenticator.cleanup(achalls)
+
+    assert session.put.call_count == 2
+    assert [_pushed_record_names(call) for call in session.put.call_args_list] == [[], []]
+
+
+def test_cleanup_skipped_without_perform(authenticator):
+    authenticator._attempt_cleanup = False
+
+    authenticator.cleanup([_achall('example.com', b'a' * 16)])
+
+    authenticator._client._session.post.assert_not_called()
+    authenticator._client._session.put.assert_not_called()
@@ -0,0 +1,288 @@
+"""Tests for certbot_dns_vimexx.vimexx_client."""
+import importlib
+import json
+import os
+import stat
+from unittest import mock
+
+import pytest
+import requests
+from certbot import errors
+
+from certbot_dns_vimexx import vimexx_client
+from certbot_dns_vimexx.vimexx_client import VimexxClient
+
+
+def _response(status=200, data=None, headers=None):
+    response = mock.Mock()
+    response.status_code = status
+    response.headers = headers or {}
+    response.content = json.dumps(data).encode()
+    response.text = response.content.decode()
+    response.json.return_value = data
+    return response
+
+
+def _request_body(call):
+    """Get the JSON body of a mocked request, sent with json= or (orjson) data=."""
+    if 'json' in call.kwargs:
+        return call.kwargs['json']
+    return json.loads(call.kwargs['data'])
+
+
+@pytest.fixture(autouse=True, params=['orjson', 'json'])
+def json_backend(request):
+    # Run every test both with and without the optional orjson fast path
+    if request.param == 'orjson':
+        pytest.importorskip('orjson')
+        with mock.patch.object(vimexx_client, 'orjson', importlib.import_module('orjson')):
+            yield request.param
+    else:
+        with mock.patch.object(vimexx_client, 'orjson', None):
+            yield request.param
+
+
+@pytest.fixture
+def client(tmp_path):
+    with mock.patch.object(vimexx_client.requests, 'Session'):
+        return VimexxClient('id', 'secret', 'user', 'pass',
+                            token_path=str(tmp_path / 'vimexx.ini.token'))
+
+
+def test_refresh_token_saved_owner_only(client):
+    with open(client.token_path, 'w') as f:
+        f.write('old')
+    os.chmod(client.token_path, 0o644)
+    client._session.post.return_value = _response(data={
+        'access_token': 'access', 'expires_in': 3600, 'refresh_token': 'refresh'})
+
+    client.authenticate()
+
+    assert stat.S_IMODE(os.stat(client.token_path).st_mode) == 0o600
+    with open(client.token_path) as f:
+        assert json.load(f) == {'refresh_token': 'refresh', 'expires_at': None}
+    assert os.listdir(os.path.dirname(client.token_path)) == ['vimexx.ini.token']
+
+
+def test_refresh_token_save_ignores_planted_temp_file(client, tmp_path):
+    # A symlink at a predictable temporary path must not be written through
+    target = tmp_path / 'target'
+    target.write_text('untouched')
+    os.symlink(target, f"{client.token_path}.tmp")
+    client._session.post.return_value = _response(data={
+        'access_token': 'access', 'refresh_token': 'refresh'})
+
+    client.authenticate()
+
+    assert target.read_text() == 'untouched'
+    assert client._load_refresh_token() == 'refresh'
+
+
+def test_invalid_refresh_token_lifetime_is_ignored(client):
+    client._session.post.return_value = _response(data={
+        'access_token': 'access', 'refresh_token': 'refresh',
+        'refresh_token_expires_in': 'never'})
+
+    client.authenticate()
+
+    assert client.access_token == 'access'
+    assert client._load_refresh_token() == 'refresh'
+
+
+@pytest.mark.parametrize('expires_at', ['tomorrow', 0])
+def test_unusable_saved_refresh_token_is_ignored(client, expires_at):
+    with open(client.token_path, 'w') as f:
+        json.dump({'refresh_token': 'refresh', 'expires_at': expires_at}, f)
+
+    assert client._load_refresh_token() is None
+
+
+def test_failed_refresh_falls_back_to_password_grant(client):
+    with open(client.token_path, 'w') as f:
+        json.dump({'refresh_token': 'stale', 'expires_at': None}, f)
+    client._session.post.side_effect = [
+        _response(status=401),
+        _response(data={'access_token': 'access'}),
+    ]
+
+    client._ensure_token()
+
+    assert client.access_token == 'access'
+    payloads = [call.kwargs['data'] for call in client._session.post.call_args_list]
+    assert 'grant_type=refresh_token' in payloads[0]
+    assert 'grant_type=password' in payloads[1]
+    assert not os.path.exists(client.token_path)
+
+
+def _dns_response(records, etag=None):
+    return _response(data={'data': {'dns_records': records}},
+                     headers={'ETag': etag} if etag else {})
+
+
+@pytest.fixture
+def authenticated(client):
+    client.access_token = 'access'
+    client._api_headers = {'Authorization': 'Bearer access'}
+    return client
+
+
+def test_cleanup_fetches_records_again_without_etag(authenticated):
+    client = authenticated
+    client._session.post.side_effect = lambda *a, **kw: _dns_response(
+        [{'name': 'www.example.com', 'type': 'A', 'content': '192.0.2.1'}])
+    client._session.put.return_value = _response(data={})
+
+    client.add_txt_records('example', 'com', [('_acme-challenge.example.com', 'token')])
+    client.delete_txt_records('example', 'com', [('_acme-challenge.example.com', 'token')])
+
+    assert client._session.post.call_count == 2
+
+
+def test_cleanup_reuses_records_with_etag(authenticated):
+    client = authenticated
+    client._session.post.return_value = _dns_response(
+        [{'name': 'www.example.com', 'type': 'A', 'content': '192.0.2.1'}], etag='"1"')
+    client._session.put.side_effect = [
+        _response(data={}, headers={'ETag': '"2"'}),
+        _response(data={}, headers={'ETag': '"3"'}),
+    ]
+
+    client.add_txt_records('example', 'com', [('_acme-challenge.example.com', 'token')])
+    client.delete_txt_records('example', 'com', [('_acme-challenge.example.com', 'token')])
+
+    assert client._session.post.call_count == 1
+    assert client._session.put.call_args.kwargs['headers']['If-Match'] == '"2"'
+
+
+@pytest.mark.parametrize('domain, expected', [
+    ('example.com', ('example', 'com')),
+    ('*.example.nl.', ('example', 'nl')),
+    ('www.example.co.uk', ('example', 'co.uk')),
+])
+def test_extract_domain_parts(client, domain, expected):
+    assert client.extract_domain_parts(domain) == expected
+
+
+def _conflict():
+    response = _response(status=412)
+    response.raise_for_status.side_effect = requests.exceptions.HTTPError(response=response)
+    return response
+
+
+def test_update_retried_after_conflict(authenticated):
+    client = authenticated
+    client._session.post.side_effect = [
+        _dns_response([], etag='"1"'),
+        _dns_response([{'name': 'www.example.com', 'type': 'A', 'content': '192.0.2.1'}],
+                      etag='"2"'),
+    ]
+    client._session.put.side_effect = [_conflict(), _response(data={})]
+
+    client.add_txt_records('example', 'com', [('_acme-challenge.example.com', 'token')])
+
+    assert client._session.post.call_count == 2
+    put_calls = client._session.put.call_args_list
+    assert [call.kwargs['headers']['If-Match'] for call in put_calls] == ['"1"', '"2"']
+    assert len(_request_body(put_calls[1])['body']['dns_records']) == 2
+
+
+def test_update_gives_up_after_repeated_conflicts(authenticated):
+    client = authenticated
+    client._session.post.side_effect = lambda *a, **kw: _dns_response([], etag='"1"')
+    client._session.put.side_effect = lambda *a, **kw: _conflict()
+
+    with pytest.raises(errors.PluginError):
+        client.add_txt_records('example', 'com', [('_acme-challenge.example.com', 'token')])
+
+    assert client._session.put.call_count == VimexxClient.MAX_CONFLICT_RETRIES + 1
+    assert ('example', 'com') not in client._records_cache
+
+
+def test_other_http_errors_are_not_retried(authenticated):
+    client = authenticated
+    client._session.post.return_value = _dns_response(
+        [{'name': '_acme-challenge.example.com', 'type': 'TXT', 'content': '"token"'}], etag='"1"')
+    response = _response(status=500)
+    response.raise_for_status.side_effect = requests.exceptions.HTTPError(response=response)
+    client._session.put.return_value = response
+
+    with pytest.raises(requests.exceptions.HTTPError):
+        client.delete_txt_records('example', 'com', [('_acme-challenge.example.com', 'token')])
+
+    assert client._session.put.call_count == 1
+    assert ('example', 'com') not in client._records_cache
+
+
+def test_access_token_reused_until_expired(client):
+    client._session.post.side_effect = [
+        _response(data={'access_token': 'first', 'expires_in': 3600}),
+        _response(data={'access_token': 'second', 'expires_in': 3600}),
+    ]
+
+    with mock.patch.object(vimexx_client.time, 'monotonic', return_value=1000.0):
+        client._ensure_token()
+        client._ensure_token()
+    assert client.access_token == 'first'
+    assert client._session.post.call_count == 1
+
+    expiry = 1000.0 + 3600 - VimexxClient.TOKEN_EXPIRY_MARGIN
+    with mock.patch.object(vimexx_client.time, 'monotonic', return_value=expiry):
+        client._ensure_token()
+    assert client.access_token == 'second'
+    assert client._api_headers['Authorization'] == 'Bearer second'
+    assert client._session.post.call_count == 2
+
+
+@pytest.mark.parametrize('expires_in', ['soon', {'seconds': 60}])
+def test_invalid_access_token_lifetime_is_ignored(client, expires_in):
+    client._session.post.return_value = _response(data={
+        'access_token': 'access', 'expires_in': expires_in})
+
+    client.authenticate()
+
+    assert client.access_token == 'access'
+    assert client._token_expiry is None
+    assert not client._token_expired()
+
+
+def test_dns_request_body_encoding(authenticated, json_backend):
+    client = authenticated
+    client._session.post.return_value = _dns_response(
+        [{'name': 'www.example.com', 'type': 'A', 'content': '192.0.2.1'}])
+    client._session.put.return_value = _response(data={})
+
+    client.add_txt_records('example', 'com', [('_acme-challenge.example.com', 'token')])
+
+    put_call = client._session.put.call_args
+    if json_backend == 'orjson':
+        assert isinstance(put_call.kwargs['data'], bytes)
+        assert 'json' not in put_call.kwargs
+    else:
+        assert 'data' not in put_call.kwargs
+    assert _request_body(put_call) == {
+        'body': {
+            'sld': 'example',
+            'tld': 'com',
+            'dns_records': [
+                {'name': 'www.example.com', 'type': 'A', 'content': '192.0.2.1',
+                 'ttl': VimexxClient.DEFAULT_TTL},
+                {'name': '_acme-challenge.example.com', 'type': 'TXT', 'content': 'token',
+                 'ttl': VimexxClient.CHALLENGE_TTL},
+            ],
+        },
+        'version': VimexxClient.WHMCS_VERSION,
+    }
+    assert _request_body(client._session.post.call_args) == {
+        'body': {'sld': 'example', 'tld': 'com'}, 'version': VimexxClient.WHMCS_VERSION}
+
+
+def test_api_request_decodes_response(authenticated, json_backend):
+    client = authenticated
+    client._session.post.return_value = _response(data={'result': 'ok'})
+
+    assert client.api_request('/whmcs/domain/dns', 'POST', {'sld': 'example'}) == {'result': 'ok'}
+
+    body = _request_body(client._session.post.call_args)
+    assert body == {'body': {'sld': 'example'}, 'version': VimexxClient.WHMCS_VERSION}
+    # With orjson, the body comes from response.content rather than response.json()
+    assert client._session.post.return_value.json.called == (json_backend == 'json')